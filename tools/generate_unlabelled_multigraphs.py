@@ -21,14 +21,35 @@ Example:
 from __future__ import annotations
 
 import argparse
+import collections
+import contextlib
+import functools
 import itertools
 import json
+import multiprocessing
+import multiprocessing.pool
+import operator
 import os
 import random
+import shutil
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import List, Sequence, Tuple
+from typing import Iterable, Iterator, List, Sequence, Tuple
 
-AdjacencyMatrix = List[List[int]]
+# multigraph_canonical.py must sit next to this script. The relative form
+# serves imports as part of the tools package, e.g. from the repository root.
+try:
+    from .multigraph_canonical import canonical_code
+except ImportError:
+    from multigraph_canonical import canonical_code
+
+# One immutable byte string per row: one byte per cell, compared and hashed in C.
+AdjacencyMatrix = List[bytes]
+
+MAX_MULTIPLICITY = 255
+
+# Number of random samples drawn per worker task in generate_unique_multigraphs.
+SAMPLE_BATCH_SIZE = 256
 
 
 @dataclass(frozen=True)
@@ -36,42 +57,27 @@ class Multigraph:
     """Container for a multigraph adjacency matrix and its canonical signature."""
 
     adjacency: AdjacencyMatrix
-    canonical: Tuple[int, ...]
+    # Flattened canonical adjacency matrix, one byte per cell.
+    canonical: bytes
 
     @property
     def order(self) -> int:
         return len(self.adjacency)
 
+    @functools.cached_property
+    def signature_list(self) -> List[int]:
+        """Canonical signature as a list of ints, built once for the metadata."""
+        return list(self.canonical)
+
     @property
     def size(self) -> int:
         """Return the total number of edges counting multiplicities (loops included)."""
-        edges = 0
-        for i in range(self.order):
-            for j in range(i, self.order):
-                mult = self.adjacency[i][j]
-                if mult <= 0:
-                    continue
-                edges += mult
-        return edges
-
-
-def canonicalize(adjacency: AdjacencyMatrix) -> Tuple[int, ...]:
-    """Return a canonical signature for an unlabeled undirected multigraph."""
-    n = len(adjacency)
-    best: Tuple[int, ...] | None = None
-
-    for perm in itertools.permutations(range(n)):
-        flat: List[int] = []
-        for i in perm:
-            row = adjacency[i]
-            for j in perm:
-                flat.append(row[j])
-        candidate = tuple(flat)
-        if best is None or candidate < best:
-            best = candidate
-    if best is None:
-        raise ValueError("Failed to canonicalize adjacency matrix.")
-    return best
+        return sum(sum(row[i:]) for i, row in enumerate(self.adjacency))
+
+
+def canonicalize(adjacency: AdjacencyMatrix) -> bytes:
+    """Return the canonical signature as bytes, so that it hashes and compares in C."""
+    return bytes(canonical_code(adjacency))
 
 
 def random_multigraph(
@@ -84,23 +90,32 @@ def random_multigraph(
     """Generate a random undirected multigraph adjacency matrix."""
     if vertices <= 0:
         raise ValueError("Number of vertices must be positive.")
+    if vertices < 2 and not allow_loops:
+        raise ValueError("At least two vertices are required without self-loops.")
     if max_multiplicity <= 0:
         raise ValueError("Maximum edge multiplicity must be at least 1.")
+    if max_multiplicity > MAX_MULTIPLICITY:
+        raise ValueError(
+            f"Maximum edge multiplicity must not exceed {MAX_MULTIPLICITY}."
+        )
 
-    adjacency = [[0 for _ in range(vertices)] for _ in range(vertices)]
-
-    for i in range(vertices):
-        for j in range(i, vertices):
-            if i == j and not allow_loops:
-                continue
-            multiplicity = rng.randint(0, max_multiplicity)
-            if multiplicity <= 0:
-                continue
-            adjacency[i][j] = multiplicity
-            adjacency[j][i] = multiplicity
+    adjacency = [bytearray(vertices) for _ in range(vertices)]
+
+    # Draw the whole upper triangle in one call rather than one randint per cell.
+    cells = [
+        (i, j)
+        for i in range(vertices)
+        for j in range(i if allow_loops else i + 1, vertices)
+    ]
+    multiplicities = rng.choices(range(max_multiplicity + 1), k=len(cells))
+    for (i, j), multiplicity in zip(cells, multiplicities):
+        if multiplicity <= 0:
+            continue
+        adjacency[i][j] = multiplicity
+        adjacency[j][i] = multiplicity
 
     # Ensure the graph is not edgeless.
-    if all(adjacency[i][j] == 0 for i in range(vertices) for j in range(vertices)):
+    if not any(multiplicities):
         if allow_loops:
             idx = rng.randrange(vertices)
             adjacency[idx][idx] = 1
@@ -108,33 +123,92 @@ def random_multigraph(
             i, j = rng.sample(range(vertices), 2)
             adjacency[i][j] = adjacency[j][i] = 1
 
-    return adjacency
+    return [bytes(row) for row in adjacency]
 
 
-def generate_unique_multigraphs(
+def _iter_samples(
+    seed: int,
     *,
-    count: int,
     vertices: int,
     max_multiplicity: int,
     allow_loops: bool,
-    rng: random.Random,
-    max_attempts: int = 10000,
-) -> List[Multigraph]:
-    """Generate a collection of multigraphs with distinct canonical signatures."""
-    unique: dict[Tuple[int, ...], AdjacencyMatrix] = {}
-    attempts = 0
-
-    while len(unique) < count and attempts < max_attempts:
+) -> Iterator[Tuple[bytes, AdjacencyMatrix]]:
+    """Lazily draw one batch of random multigraphs, each with its canonical signature."""
+    rng = random.Random(seed)
+    for _ in range(SAMPLE_BATCH_SIZE):
         adjacency = random_multigraph(
             vertices=vertices,
             max_multiplicity=max_multiplicity,
             allow_loops=allow_loops,
             rng=rng,
         )
-        signature = canonicalize(adjacency)
-        if signature not in unique:
-            unique[signature] = adjacency
-        attempts += 1
+        yield canonicalize(adjacency), adjacency
+
+
+def _sample_batch(seed: int, **params) -> List[Tuple[bytes, AdjacencyMatrix]]:
+    """Worker task: draw and canonicalize a whole batch of `_iter_samples`."""
+    return list(_iter_samples(seed, **params))
+
+
+def _bounded_imap(
+    pool: multiprocessing.pool.Pool, func, seeds: Sequence[int], in_flight: int
+) -> Iterator[List[Tuple[bytes, AdjacencyMatrix]]]:
+    """Like `pool.imap`, but with at most `in_flight` batches queued at a time.
+
+    Batches past the point where enough graphs are found are never submitted.
+    """
+    pending: collections.deque = collections.deque()
+    for seed in seeds:
+        pending.append(pool.apply_async(func, (seed,)))
+        if len(pending) >= in_flight:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+def generate_unique_multigraphs(
+    *,
+    count: int,
+    vertices: int,
+    max_multiplicity: int,
+    allow_loops: bool,
+    rng: random.Random,
+    max_attempts: int = 10000,
+    jobs: int = 1,
+) -> List[Multigraph]:
+    """Generate a collection of multigraphs with distinct canonical signatures.
+
+    Samples are drawn in batches, each from its own RNG seeded by `rng`, so the
+    result does not depend on `jobs`. With `jobs > 1` the batches, including
+    their canonicalization, are produced by a process pool and the parent only
+    dedupes by signature; otherwise samples are drawn and canonicalized one at
+    a time, so none is processed past the last graph needed.
+    """
+    unique: dict[bytes, AdjacencyMatrix] = {}
+
+    batch_count = -(-max_attempts // SAMPLE_BATCH_SIZE) if max_attempts > 0 else 0
+    seeds = [rng.getrandbits(64) for _ in range(batch_count)]
+    params = dict(
+        vertices=vertices,
+        max_multiplicity=max_multiplicity,
+        allow_loops=allow_loops,
+    )
+    pool = multiprocessing.Pool(jobs) if jobs > 1 and batch_count > 1 else None
+    try:
+        if pool is not None:
+            sample_batch = functools.partial(_sample_batch, **params)
+            batches = _bounded_imap(pool, sample_batch, seeds, 2 * jobs)
+        else:
+            batches = (_iter_samples(seed, **params) for seed in seeds)
+        samples = itertools.islice(itertools.chain.from_iterable(batches), max_attempts)
+        for signature, adjacency in samples:
+            if signature not in unique:
+                unique[signature] = adjacency
+                if len(unique) >= count:
+                    break
+    finally:
+        if pool is not None:
+            pool.terminate()
 
     if len(unique) < count:
         raise RuntimeError(
@@ -151,49 +225,116 @@ def apply_random_permutation(
 ) -> Tuple[AdjacencyMatrix, List[int]]:
     """Return a permuted copy of adjacency and the mapping from original to new IDs."""
     n = len(adjacency)
-    if n == 0:
-        return [], []
+    if n < 2:
+        return list(adjacency), list(range(n))
     new_order = list(range(n))
     rng.shuffle(new_order)
-    permuted = [[0 for _ in range(n)] for _ in range(n)]
-    for new_i, old_i in enumerate(new_order):
-        for new_j, old_j in enumerate(new_order):
-            permuted[new_i][new_j] = adjacency[old_i][old_j]
+    # One gatherer shared by every row instead of a map object per row.
+    gather = operator.itemgetter(*new_order)
+    permuted = [bytes(gather(adjacency[old_i])) for old_i in new_order]
     # Map original vertex index -> new index
-    mapping = [0 for _ in range(n)]
+    mapping = [0] * n
     for new_idx, old_idx in enumerate(new_order):
         mapping[old_idx] = new_idx
     return permuted, mapping
 
 
-def write_gml(adjacency: AdjacencyMatrix, path: str) -> None:
-    """Write the adjacency matrix to a GML file without labels."""
+def render_gml(adjacency: AdjacencyMatrix) -> bytes:
+    """Serialize the adjacency matrix as an unlabeled GML document."""
     n = len(adjacency)
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding="utf-8") as handle:
-        handle.write("graph [\n")
-        handle.write("  directed 0\n")
-        for node_id in range(n):
-            handle.write("  node [\n")
-            handle.write(f"    id {node_id}\n")
-            handle.write("  ]\n")
-        for i in range(n):
-            for j in range(i, n):
-                multiplicity = adjacency[i][j]
-                if multiplicity <= 0:
-                    continue
-                for _ in range(multiplicity):
-                    handle.write("  edge [\n")
-                    handle.write(f"    source {i}\n")
-                    handle.write(f"    target {j}\n")
-                    handle.write("  ]\n")
-        handle.write("]\n")
-
-
-def write_metadata(path: str, metadata: dict) -> None:
+    parts = ["graph [\n", "  directed 0\n"]
+    parts.extend(f"  node [\n    id {node_id}\n  ]\n" for node_id in range(n))
+    for i, row in enumerate(adjacency):
+        for j in range(i, n):
+            multiplicity = row[j]
+            if multiplicity <= 0:
+                continue
+            parts.append(
+                f"  edge [\n    source {i}\n    target {j}\n  ]\n" * multiplicity
+            )
+    parts.append("]\n")
+    return "".join(parts).encode("ascii")
+
+
+def write_gml(adjacency: AdjacencyMatrix, path: str) -> None:
+    """Write the adjacency matrix to a GML file without labels.
+
+    The parent directory must already exist; build_pairs() creates the output
+    directory once instead of every file write checking for it.
+    """
+    with open(path, "wb") as handle:
+        handle.write(render_gml(adjacency))
+
+
+def link_or_copy(source: str, path: str) -> None:
+    """Make `path` a hard link to `source`, copying it where links are unsupported."""
+    try:
+        os.link(source, path)
+    except OSError:
+        shutil.copyfile(source, path)
+
+
+def _remove_stale(path: str) -> None:
+    # Files left by an earlier run may be hard links; writing through them
+    # would also change the files they are linked to.
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(path)
+
+
+def _rewrite_gml(adjacency: AdjacencyMatrix, path: str) -> None:
+    _remove_stale(path)
+    write_gml(adjacency, path)
+
+
+def _relink(source_written: Future, source: str, path: str) -> None:
+    source_written.result()
+    _remove_stale(path)
+    link_or_copy(source, path)
+
+
+def write_metadata(path: str, header: dict, pairs: Iterable[dict]) -> None:
+    """Write metadata.json, serializing the pair entries one at a time.
+
+    The layout is the same as `json.dump` of the whole document with indent=2,
+    but `pairs` is consumed lazily so the entries never coexist in memory. The
+    document goes to a temporary file that only replaces `path` once complete.
+    """
+    temp_path = path + ".tmp"
+    try:
+        _write_metadata_stream(temp_path, header, pairs)
+    except BaseException:
+        _remove_stale(temp_path)
+        raise
+    os.replace(temp_path, path)
+
+
+def _write_metadata_stream(path: str, header: dict, pairs: Iterable[dict]) -> None:
     with open(path, "w", encoding="utf-8") as handle:
-        json.dump(metadata, handle, indent=2)
-        handle.write("\n")
+        # Reopen the header object to append the "pairs" member.
+        handle.write(json.dumps(header, indent=2)[: -len("\n}")])
+        handle.write(',\n  "pairs": [')
+        separator = "\n    "
+        for pair in pairs:
+            handle.write(separator)
+            handle.write(json.dumps(pair, indent=2).replace("\n", "\n    "))
+            separator = ",\n    "
+        handle.write("]\n}\n" if separator == "\n    " else "\n  ]\n}\n")
+
+
+def check_pair_pool(*, positive: int, negative: int, base_graphs: List[Multigraph]) -> None:
+    """Raise if `base_graphs` cannot provide the requested pairs."""
+    if not base_graphs:
+        raise ValueError("No base graphs were generated.")
+    if positive > 0 and len(base_graphs) == 1:
+        # Ensure we can produce non-trivial permutations even when only one base graph exists.
+        if base_graphs[0].order < 2:
+            raise RuntimeError(
+                "Cannot create isomorphic pairs with fewer than 2 vertices."
+            )
+    if negative > 0 and len(base_graphs) < 2:
+        raise RuntimeError(
+            "Need at least two distinct base graphs to create non-isomorphic pairs."
+        )
 
 
 def build_pairs(
@@ -201,38 +342,34 @@ def build_pairs(
     positive: int,
     negative: int,
     base_graphs: List[Multigraph],
-    vertices: int,
     output_dir: str,
     rng: random.Random,
-) -> dict:
-    """Construct graph pairs and emit files plus metadata."""
-    if not base_graphs:
-        raise ValueError("No base graphs were generated.")
+    executor: Executor,
+) -> Iterator[dict]:
+    """Construct graph pairs, yielding their metadata entries one by one.
 
-    os.makedirs(output_dir, exist_ok=True)
+    The GML files of each pair are queued on `executor` as the pair is built.
+    A base graph reused by several pairs is written once and hard-linked.
+    """
+    check_pair_pool(positive=positive, negative=negative, base_graphs=base_graphs)
 
-    metadata: dict = {
-        "description": (
-            "Automatically generated unlabeled multigraph pairs for "
-            "graph isomorphism testing."
-        ),
-        "parameters": {
-            "vertices": vertices,
-            "positive_pairs": positive,
-            "negative_pairs": negative,
-        },
-        "pairs": [],
-    }
+    os.makedirs(output_dir, exist_ok=True)
 
     pair_index = 0
     graph_pool = base_graphs.copy()
-
-    if positive > 0 and len(graph_pool) == 1:
-        # Ensure we can produce non-trivial permutations even when only one base graph exists.
-        if graph_pool[0].order < 2:
-            raise RuntimeError(
-                "Cannot create isomorphic pairs with fewer than 2 vertices."
-            )
+    file_jobs: List[Future] = []
+    # id(base adjacency) -> (first path, its write job); base graphs outlive the loop.
+    first_writes: dict[int, Tuple[str, Future]] = {}
+
+    def emit_base(adjacency: AdjacencyMatrix, path: str) -> None:
+        first = first_writes.get(id(adjacency))
+        if first is None:
+            job = executor.submit(_rewrite_gml, adjacency, path)
+            first_writes[id(adjacency)] = (path, job)
+        else:
+            source, source_job = first
+            job = executor.submit(_relink, source_job, source, path)
+        file_jobs.append(job)
 
     # Generate isomorphic pairs.
     for idx in range(positive):
@@ -243,29 +380,22 @@ def build_pairs(
         pattern_path = os.path.join(output_dir, f"{pair_id}_pattern.gml")
         target_path = os.path.join(output_dir, f"{pair_id}_target.gml")
 
-        write_gml(base.adjacency, pattern_path)
-        write_gml(permuted, target_path)
-
-        metadata["pairs"].append(
-            {
-                "id": pair_id,
-                "type": "isomorphic",
-                "pattern": os.path.basename(pattern_path),
-                "target": os.path.basename(target_path),
-                "vertex_count": base.order,
-                "edge_count": base.size,
-                "canonical_signature": list(base.canonical),
-                "permutation": mapping,
-            }
-        )
+        emit_base(base.adjacency, pattern_path)
+        file_jobs.append(executor.submit(_rewrite_gml, permuted, target_path))
+
+        yield {
+            "id": pair_id,
+            "type": "isomorphic",
+            "pattern": os.path.basename(pattern_path),
+            "target": os.path.basename(target_path),
+            "vertex_count": base.order,
+            "edge_count": base.size,
+            "canonical_signature": base.signature_list,
+            "permutation": mapping,
+        }
         pair_index += 1
 
     # Generate non-isomorphic pairs.
-    if negative > 0 and len(graph_pool) < 2:
-        raise RuntimeError(
-            "Need at least two distinct base graphs to create non-isomorphic pairs."
-        )
-
     for idx in range(negative):
         left = graph_pool[(positive + 2 * idx) % len(graph_pool)]
         right = graph_pool[(positive + 2 * idx + 1) % len(graph_pool)]
@@ -282,25 +412,25 @@ def build_pairs(
         pattern_path = os.path.join(output_dir, f"{pair_id}_pattern.gml")
         target_path = os.path.join(output_dir, f"{pair_id}_target.gml")
 
-        write_gml(left.adjacency, pattern_path)
-        write_gml(right.adjacency, target_path)
-
-        metadata["pairs"].append(
-            {
-                "id": pair_id,
-                "type": "non-isomorphic",
-                "pattern": os.path.basename(pattern_path),
-                "target": os.path.basename(target_path),
-                "vertex_count": left.order,
-                "pattern_edge_count": left.size,
-                "target_edge_count": right.size,
-                "pattern_canonical_signature": list(left.canonical),
-                "target_canonical_signature": list(right.canonical),
-            }
-        )
+        emit_base(left.adjacency, pattern_path)
+        emit_base(right.adjacency, target_path)
+
+        yield {
+            "id": pair_id,
+            "type": "non-isomorphic",
+            "pattern": os.path.basename(pattern_path),
+            "target": os.path.basename(target_path),
+            "vertex_count": left.order,
+            "pattern_edge_count": left.size,
+            "target_edge_count": right.size,
+            "pattern_canonical_signature": left.signature_list,
+            "target_canonical_signature": right.signature_list,
+        }
         pair_index += 1
 
-    return metadata
+    # Surface file errors before the caller finishes the metadata.
+    for job in file_jobs:
+        job.result()
 
 
 def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
@@ -322,7 +452,7 @@ def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
         "--max-multiplicity",
         type=int,
         default=2,
-        help="Maximum multiplicity per edge (default: 2).",
+        help=f"Maximum multiplicity per edge, at most {MAX_MULTIPLICITY} (default: 2).",
     )
     parser.add_argument(
         "--allow-loops",
@@ -353,6 +483,15 @@ def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
         default=20000,
         help="Maximum attempts to find the requested number of unique graphs.",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help=(
+            "Number of worker processes sampling candidate graphs "
+            "(default: number of CPUs; 1 disables multiprocessing)."
+        ),
+    )
 
     args = parser.parse_args(argv)
 
@@ -360,6 +499,13 @@ def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
         raise SystemExit("Pair counts must be non-negative.")
     if args.positive == 0 and args.negative == 0:
         raise SystemExit("Request at least one pair (positive or negative).")
+    if args.max_multiplicity > MAX_MULTIPLICITY:
+        # Adjacency rows store one multiplicity per byte.
+        raise SystemExit(
+            f"Maximum edge multiplicity must not exceed {MAX_MULTIPLICITY}."
+        )
+    if args.jobs < 1:
+        raise SystemExit("Number of jobs must be at least 1.")
 
     return args
 
@@ -379,19 +525,39 @@ def main(argv: Sequence[str] | None = None) -> None:
         allow_loops=args.allow_loops,
         rng=rng,
         max_attempts=args.max_attempts,
+        jobs=args.jobs,
     )
 
-    metadata = build_pairs(
-        positive=args.positive,
-        negative=args.negative,
-        base_graphs=base_graphs,
-        vertices=args.vertices,
-        output_dir=args.output_dir,
-        rng=rng,
+    # build_pairs only runs once metadata.json is being written; fail before that.
+    check_pair_pool(
+        positive=args.positive, negative=args.negative, base_graphs=base_graphs
     )
 
+    # metadata.json is opened before build_pairs() runs and creates the directory.
+    os.makedirs(args.output_dir, exist_ok=True)
+    header = {
+        "description": (
+            "Automatically generated unlabeled multigraph pairs for "
+            "graph isomorphism testing."
+        ),
+        "parameters": {
+            "vertices": args.vertices,
+            "positive_pairs": args.positive,
+            "negative_pairs": args.negative,
+        },
+    }
     metadata_path = os.path.join(args.output_dir, "metadata.json")
-    write_metadata(metadata_path, metadata)
+    max_workers = min(32, (os.cpu_count() or 1) * 4)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pairs = build_pairs(
+            positive=args.positive,
+            negative=args.negative,
+            base_graphs=base_graphs,
+            output_dir=args.output_dir,
+            rng=rng,
+            executor=executor,
+        )
+        write_metadata(metadata_path, header, pairs)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,167 @@
+"""
+Canonical form and colour refinement for unlabeled undirected multigraphs.
+
+Shared by generate_unlabelled_multigraphs.py, which records canonical
+signatures in the metadata, and verify_unlabelled_metadata.py, which checks
+them. Adjacency matrices are sequences of rows indexable by vertex, such as
+bytes or tuples of ints.
+"""
+
+from __future__ import annotations
+
+from typing import List, Sequence
+
+Adjacency = Sequence[Sequence[int]]
+
+
+def _placed_row(
+    adjacency: Adjacency,
+    placed: List[int],
+    cells: List[List[int]],
+    vertex: int,
+) -> List[int]:
+    """Return the row of the permuted matrix contributed by placing `vertex` next.
+
+    Within each cell the unplaced vertices are taken by ascending multiplicity
+    towards `vertex`, which is the smallest row this placement can produce.
+    Every step runs in C builtins (map, sorted) as this is the hottest loop.
+    """
+    row_v = adjacency[vertex]
+    lookup = row_v.__getitem__
+    row = list(map(lookup, placed))
+    row.append(row_v[vertex])
+    first = list(map(lookup, cells[0]))
+    first.remove(row_v[vertex])
+    row.extend(sorted(first))
+    for cell in cells[1:]:
+        row.extend(sorted(map(lookup, cell)))
+    return row
+
+
+def _refine(
+    adjacency: Adjacency, cells: List[List[int]], vertex: int
+) -> List[List[int]]:
+    """Split the cells left after placing `vertex` by multiplicity towards it."""
+    row_v = adjacency[vertex]
+    lookup = row_v.__getitem__
+    remaining = [u for u in cells[0] if u != vertex]
+    refined: List[List[int]] = []
+    for cell in ([remaining] if remaining else []) + cells[1:]:
+        values = list(map(lookup, cell))
+        if min(values) == max(values):
+            # The cell is not split: keep it as is and skip the grouping.
+            refined.append(cell)
+            continue
+        groups: dict[int, List[int]] = {}
+        for u, value in zip(cell, values):
+            groups.setdefault(value, []).append(u)
+        refined.extend(groups[value] for value in sorted(groups))
+    return refined
+
+
+def _twin_representatives(adjacency: Adjacency) -> List[int]:
+    """Map every vertex to the smallest vertex of its twin class.
+
+    Two vertices are twins when swapping them is an automorphism: same loop
+    multiplicity and same multiplicity towards every other vertex. Twins are
+    always in the same cell, so placing either one leads to the same codes.
+    """
+    n = len(adjacency)
+    representatives = list(range(n))
+    for v in range(n):
+        row_v = adjacency[v]
+        for u in range(v):
+            if representatives[u] != u:
+                continue
+            row_u = adjacency[u]
+            # Compare every column but u and v (u < v) as three row slices.
+            if (
+                row_u[u] == row_v[v]
+                and row_u[:u] == row_v[:u]
+                and row_u[u + 1 : v] == row_v[u + 1 : v]
+                and row_u[v + 1 :] == row_v[v + 1 :]
+            ):
+                representatives[v] = u
+                break
+    return representatives
+
+
+def canonical_code(adjacency: Adjacency) -> List[int]:
+    """Return the canonical code of an unlabeled undirected multigraph.
+
+    The code is the lexicographically smallest row-major flattening of the
+    adjacency matrix over all vertex orderings. Instead of enumerating every
+    permutation, vertices are placed one position at a time: placing a vertex
+    fixes its whole row once the still-unplaced vertices are ordered by their
+    multiplicity towards it, so only the candidates yielding the smallest row
+    are explored, and branches whose prefix already exceeds the best complete
+    code are pruned. Of several twin candidates only one is explored.
+    """
+    n = len(adjacency)
+    if n == 0:
+        return []
+    best: List[int] | None = None
+    twins = _twin_representatives(adjacency)
+
+    def search(placed: List[int], cells: List[List[int]], code: List[int]) -> None:
+        nonlocal best
+        if not cells:
+            if best is None or code < best:
+                best = code
+            return
+        branches: List[int] = []
+        smallest: List[int] | None = None
+        explored_twins = set()
+        for vertex in cells[0]:
+            if twins[vertex] in explored_twins:
+                continue
+            explored_twins.add(twins[vertex])
+            row = _placed_row(adjacency, placed, cells, vertex)
+            if smallest is None or row < smallest:
+                smallest = row
+                branches = [vertex]
+            elif row == smallest:
+                branches.append(vertex)
+        assert smallest is not None
+        prefix = code + smallest
+        if best is not None and prefix > best[: len(prefix)]:
+            return
+        for vertex in branches:
+            search(placed + [vertex], _refine(adjacency, cells, vertex), prefix)
+
+    search([], [list(range(n))], [])
+    if best is None:
+        raise ValueError("Failed to canonicalize adjacency matrix.")
+    return best
+
+
+def refinement_colors(adjacency: Adjacency) -> List[int]:
+    """Return per-vertex 1-WL colour refinement colours of the multigraph.
+
+    Colours are plain hashes, not renumbered per graph, so the colours of two
+    graphs can be compared: isomorphic vertices always get the same colour.
+    """
+    n = len(adjacency)
+    colors = [hash((row[i], tuple(sorted(row)))) for i, row in enumerate(adjacency)]
+    distinct = len(set(colors))
+    for _ in range(n):
+        colors = [
+            hash(
+                (
+                    colors[i],
+                    tuple(
+                        sorted(
+                            (colors[j], mult)
+                            for j, mult in enumerate(row)
+                            if mult > 0 and j != i
+                        )
+                    ),
+                )
+            )
+            for i, row in enumerate(adjacency)
+        ]
+        refined = len(set(colors))
+        if refined == distinct:
+            break
+        distinct = refined
+    return colors
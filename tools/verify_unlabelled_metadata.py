@@ -14,14 +14,57 @@ Example:
 from __future__ import annotations
 
 import argparse
+import functools
 import itertools
 import json
+import operator
 import os
 import sys
-import xml.etree.ElementTree as ET
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from typing import Counter as CounterType, Iterable, List, Optional, Sequence, Tuple
+from typing import (
+    Callable,
+    Counter as CounterType,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+try:
+    from lxml import etree as ET
+except ImportError:
+    import xml.etree.ElementTree as ET
+
+# multigraph_canonical.py must sit next to this script. The relative form
+# serves imports as part of the tools package, e.g. from the repository root.
+try:
+    from .multigraph_canonical import canonical_code, refinement_colors
+except ImportError:
+    from multigraph_canonical import canonical_code, refinement_colors
+
+
+# Details are either text or a zero-argument callable producing it on demand.
+Details = Union[str, Callable[[], str], None]
+
+
+def deferred(template: str, *args: object) -> Callable[[], str]:
+    """Return picklable details that format `template` with `args` when displayed."""
+    return functools.partial(template.format, *args)
+
+
+def _format_signatures(template: str, *signatures: object) -> str:
+    return template.format(
+        *(list(sig) if isinstance(sig, (bytes, tuple)) else sig for sig in signatures)
+    )
+
+
+def deferred_signatures(template: str, *signatures: object) -> Callable[[], str]:
+    """Like deferred(), but packed signatures are only listed when displayed."""
+    return functools.partial(_format_signatures, template, *signatures)
 
 
 @dataclass
@@ -31,67 +74,146 @@ class Check:
     subject: str
     name: str
     ok: bool
-    details: Optional[str] = None
+    details: Details = None
+
+
+# Largest order for which --cross-check recomputes canonical signatures by
+# trying every vertex ordering, independently of the shared search.
+BRUTE_FORCE_MAX_ORDER = 8
+
+
+def brute_force_canonical_code(adjacency: Sequence[Sequence[int]]) -> Tuple[int, ...]:
+    """Return the smallest row-major flattening over all vertex orderings."""
+    if len(adjacency) < 2:
+        return tuple(row[0] for row in adjacency)
+    best: Optional[Tuple[int, ...]] = None
+    for perm in itertools.permutations(range(len(adjacency))):
+        pick = operator.itemgetter(*perm)
+        candidate = tuple(itertools.chain.from_iterable(map(pick, pick(adjacency))))
+        if best is None or candidate < best:
+            best = candidate
+    assert best is not None
+    return best
+
+
+# Packed canonical signature: bytes when every entry fits in a byte, which
+# makes comparisons a single memcmp, and a tuple of ints otherwise.
+PackedSignature = Union[bytes, Tuple[int, ...]]
+
+
+def pack_signature(values: Sequence[int]) -> Optional[PackedSignature]:
+    """Pack a metadata signature like Graph.packed_signature(); None if not a sequence."""
+    if not isinstance(values, (list, tuple)):
+        return None
+    try:
+        return bytes(values)
+    except (TypeError, ValueError):
+        return tuple(values)
+
+
+def _pack_code(code: Sequence[int]) -> PackedSignature:
+    return bytes(code) if max(code, default=0) < 256 else tuple(code)
+
+
+@functools.lru_cache(maxsize=None)
+def _memoized_signature(adjacency: Tuple[Tuple[int, ...], ...]) -> PackedSignature:
+    """Packed canonical code, cached by matrix contents across graphs."""
+    return _pack_code(canonical_code(adjacency))
+
+
+@functools.lru_cache(maxsize=None)
+def _memoized_brute_force_signature(
+    adjacency: Tuple[Tuple[int, ...], ...]
+) -> PackedSignature:
+    """Packed brute_force_canonical_code, cached like _memoized_signature."""
+    return _pack_code(brute_force_canonical_code(adjacency))
 
 
 class Graph:
-    """Lightweight container for an unlabeled undirected multigraph."""
+    """Lightweight container for an unlabeled undirected multigraph (tuple rows)."""
 
     def __init__(
         self,
         *,
         path: str,
-        adjacency: List[List[int]],
+        adjacency: Sequence[Sequence[int]],
         orig_ids: List[int],
         xml_to_index: dict,
         edge_count: int,
         edge_multiset: CounterType[Tuple[int, int]],
     ) -> None:
         self.path = path
-        self.adjacency = adjacency
+        self.adjacency: List[Tuple[int, ...]] = [tuple(row) for row in adjacency]
         self.orig_ids = orig_ids
         self.xml_to_index = xml_to_index
         self.edge_count = edge_count
         self.edge_multiset = edge_multiset
-        self._canonical_signature: Optional[Tuple[int, ...]] = None
+        # Column view of edge_multiset used by check_subgraph_mapping.
+        self.edges_u = [u for u, _ in edge_multiset]
+        self.edges_v = [v for _, v in edge_multiset]
+        self.edges_mult = list(edge_multiset.values())
+        # Multiplicity by packed vertex pair u * order + v, in both orientations,
+        # so lookups need neither a key tuple nor endpoint ordering.
+        order = len(self.adjacency)
+        self._edge_lookup = {}
+        for (u, v), count in edge_multiset.items():
+            self._edge_lookup[u * order + v] = self._edge_lookup[v * order + u] = count
+        self._canonical_signature: Optional[PackedSignature] = None
+        self._wl_colors: Optional[List[int]] = None
+        self._adj_bits: Optional[List[int]] = None
 
     @classmethod
     def from_gxl(cls, path: str) -> "Graph":
-        tree = ET.parse(path)
-        root = tree.getroot()
-        graph_elem = root.find("graph")
-        if graph_elem is None:
-            raise ValueError(f"{path}: missing <graph> element")
-
+        # Single streaming pass: node and edge elements of the first top-level
+        # <graph> are read as they close and cleared right away. Edges are
+        # buffered because their indices depend on the sorted node order.
+        found_graph = in_graph = False
+        depth = 0
         nodes = []
-        for node in graph_elem.findall("node"):
-            xml_id = node.attrib.get("id")
-            if xml_id is None:
-                raise ValueError(f"{path}: node without id attribute")
-            attr = node.find("./attr[@name='original_id']/string")
-            if attr is not None and attr.text is not None:
-                orig = int(attr.text)
-            else:
-                if xml_id.startswith("n"):
-                    orig = int(xml_id[1:])
+        edge_ends = []
+        for event, elem in ET.iterparse(path, events=("start", "end")):
+            if event == "start":
+                depth += 1
+                if depth == 2 and not found_graph and elem.tag == "graph":
+                    found_graph = in_graph = True
+                continue
+            depth -= 1
+            if depth == 1:
+                in_graph = False
+            elif depth != 2 or not in_graph:
+                continue
+            elif elem.tag == "node":
+                xml_id = elem.attrib.get("id")
+                if xml_id is None:
+                    raise ValueError(f"{path}: node without id attribute")
+                attr = elem.find("./attr[@name='original_id']/string")
+                if attr is not None and attr.text is not None:
+                    orig = int(attr.text)
                 else:
-                    raise ValueError(
-                        f"{path}: cannot infer original_id for node '{xml_id}'"
-                    )
-            nodes.append((xml_id, orig))
+                    if xml_id.startswith("n"):
+                        orig = int(xml_id[1:])
+                    else:
+                        raise ValueError(
+                            f"{path}: cannot infer original_id for node '{xml_id}'"
+                        )
+                nodes.append((xml_id, orig))
+                elem.clear()
+            elif elem.tag == "edge":
+                edge_ends.append((elem.attrib.get("from"), elem.attrib.get("to")))
+                elem.clear()
+        if not found_graph:
+            raise ValueError(f"{path}: missing <graph> element")
 
         nodes.sort(key=lambda item: item[1])
         orig_ids = [orig for _, orig in nodes]
         xml_to_index = {xml_id: idx for idx, (xml_id, _) in enumerate(nodes)}
         order = len(nodes)
 
-        adjacency = [[0 for _ in range(order)] for _ in range(order)]
+        adjacency = [[0] * order for _ in range(order)]
         edge_multiset: CounterType[Tuple[int, int]] = Counter()
         edge_count = 0
 
-        for edge in graph_elem.findall("edge"):
-            source = edge.attrib.get("from")
-            target = edge.attrib.get("to")
+        for source, target in edge_ends:
             if source is None or target is None:
                 raise ValueError(f"{path}: edge without 'from'/'to' attributes")
             if source not in xml_to_index or target not in xml_to_index:
@@ -118,70 +240,223 @@ class Graph:
     def order(self) -> int:
         return len(self.adjacency)
 
-    @property
+    @functools.cached_property
     def orig_to_index(self) -> dict:
         return {orig: idx for idx, orig in enumerate(self.orig_ids)}
 
     def canonical_signature(self) -> List[int]:
+        return list(self.packed_signature())
+
+    def packed_signature(self) -> PackedSignature:
         if self._canonical_signature is None:
-            best: Optional[Tuple[int, ...]] = None
-            for perm in itertools.permutations(range(self.order)):
-                flattened: List[int] = []
-                for i in perm:
-                    row = self.adjacency[i]
-                    for j in perm:
-                        flattened.append(row[j])
-                candidate = tuple(flattened)
-                if best is None or candidate < best:
-                    best = candidate
-            if best is None:
-                raise ValueError(f"{self.path}: failed to compute canonical signature")
-            self._canonical_signature = best
-        return list(self._canonical_signature)
+            self._canonical_signature = _memoized_signature(tuple(self.adjacency))
+        return self._canonical_signature
+
+    def brute_force_signature(self) -> PackedSignature:
+        """Packed canonical signature found by trying every vertex ordering (n! work)."""
+        return _memoized_brute_force_signature(tuple(self.adjacency))
 
     def check_mapping(self, other: "Graph", mapping: Sequence[int]) -> bool:
         if len(mapping) != self.order:
             return False
         if len(set(mapping)) != len(mapping):
             return False
-        for i in range(self.order):
-            for j in range(self.order):
-                if self.adjacency[i][j] != other.adjacency[mapping[i]][mapping[j]]:
-                    return False
-        return True
+        if self.order < 2:
+            return all(
+                row[0] == other.adjacency[m][m] for row, m in zip(self.adjacency, mapping)
+            )
+        permute = operator.itemgetter(*mapping)
+        return all(
+            row == permute(other.adjacency[m]) for row, m in zip(self.adjacency, mapping)
+        )
 
     def check_subgraph_mapping(self, other: "Graph", mapping: Sequence[int]) -> bool:
         if len(mapping) != self.order:
             return False
         if len(set(mapping)) != len(mapping):
             return False
-        needed: CounterType[Tuple[int, int]] = Counter()
-        for (u, v), count in self.edge_multiset.items():
-            mu = mapping[u]
-            mv = mapping[v]
-            key = (mu, mv) if mu <= mv else (mv, mu)
-            needed[key] += count
-        for key, count in needed.items():
-            if other.edge_multiset.get(key, 0) < count:
+        # An injective mapping sends distinct pattern edges to distinct target
+        # vertex pairs, so each edge can be checked on its own.
+        stride = other.order
+        if mapping and not (0 <= min(mapping) and max(mapping) < stride):
+            # Packed keys of out-of-range vertices would alias real pairs.
+            return False
+        available = other._edge_lookup.get
+        for mu, mv, count in zip(
+            map(mapping.__getitem__, self.edges_u),
+            map(mapping.__getitem__, self.edges_v),
+            self.edges_mult,
+        ):
+            if available(mu * stride + mv, 0) < count:
                 return False
         return True
 
-    def enumerate_isomorphisms(self, other: "Graph") -> List[Tuple[int, ...]]:
-        if self.order != other.order or self.edge_count != other.edge_count:
-            return []
-        matches: List[Tuple[int, ...]] = []
-        for perm in itertools.permutations(range(other.order)):
-            if self.check_mapping(other, perm):
-                matches.append(tuple(perm))
-        return matches
+    @property
+    def degrees(self) -> List[int]:
+        return [sum(row) for row in self.adjacency]
+
+    @property
+    def adj_bits(self) -> List[int]:
+        """Neighbourhood of every vertex as an int with bit `v` set for each neighbour."""
+        if self._adj_bits is None:
+            self._adj_bits = [
+                sum(1 << v for v, mult in enumerate(row) if mult) for row in self.adjacency
+            ]
+        return self._adj_bits
+
+    @property
+    def has_parallel_edges(self) -> bool:
+        return any(count > 1 for (u, v), count in self.edge_multiset.items() if u != v)
+
+    @property
+    def wl_colors(self) -> List[int]:
+        """Per-vertex 1-WL (color refinement) colors, comparable across graphs."""
+        if self._wl_colors is None:
+            self._wl_colors = refinement_colors(self.adjacency)
+        return self._wl_colors
+
+    @property
+    def wl_multiset(self) -> CounterType[int]:
+        return Counter(self.wl_colors)
 
-    def enumerate_subgraph_embeddings(self, other: "Graph") -> List[Tuple[int, ...]]:
+    def _match_vertices(
+        self,
+        other: "Graph",
+        *,
+        exact: bool,
+        only: Optional[Sequence[int]] = None,
+        first: bool = False,
+    ) -> List[Tuple[int, ...]]:
+        """Return injective mappings into `other` in lexicographic order, by backtracking.
+
+        `exact` requires equal multiplicities; `only` limits the search to one mapping.
+        """
+        fits = operator.eq if exact else operator.le
+        compare_multiplicities = self.has_parallel_edges or (
+            exact and other.has_parallel_edges
+        )
+        target_bits = other.adj_bits
+        earlier_neighbours = [
+            [j for j in range(i) if row[j]] for i, row in enumerate(self.adjacency)
+        ]
+        if exact:
+            target_colors = other.wl_colors
+            candidates = [
+                [
+                    t
+                    for t in range(other.order)
+                    if target_colors[t] == color
+                    and self.adjacency[i][i] == other.adjacency[t][t]
+                ]
+                for i, color in enumerate(self.wl_colors)
+            ]
+        else:
+            target_degrees = other.degrees
+            candidates = [
+                [
+                    t
+                    for t in range(other.order)
+                    if degree <= target_degrees[t]
+                    and self.adjacency[i][i] <= other.adjacency[t][t]
+                ]
+                for i, degree in enumerate(self.degrees)
+            ]
+        if only is not None:
+            candidates = [[t] if t in options else [] for t, options in zip(only, candidates)]
+        pattern_order = self.order
+        pattern_rows = self.adjacency
+        target_rows = other.adjacency
+        mapping: List[int] = []
         matches: List[Tuple[int, ...]] = []
-        for perm in itertools.permutations(range(other.order), self.order):
-            if self.check_subgraph_mapping(other, perm):
-                matches.append(tuple(perm))
+
+        def extend(i: int, used: int) -> None:
+            last = i + 1 == pattern_order
+            row = pattern_rows[i]
+            earlier = earlier_neighbours[i]
+            required = 0
+            for j in earlier:
+                required |= 1 << mapping[j]
+            for t in candidates[i]:
+                if used >> t & 1:
+                    continue
+                present = target_bits[t] & used if exact else target_bits[t] & required
+                if present != required:
+                    continue
+                if compare_multiplicities:
+                    target_row = target_rows[t]
+                    if not all(fits(row[j], target_row[mapping[j]]) for j in earlier):
+                        continue
+                if last:
+                    # Record complete mappings here rather than in another call.
+                    matches.append((*mapping, t))
+                    if first:
+                        return
+                    continue
+                mapping.append(t)
+                extend(i + 1, used | 1 << t)
+                mapping.pop()
+                if first and matches:
+                    return
+
+        if pattern_order:
+            extend(0, 0)
+        else:
+            matches.append(())
         return matches
 
+    def isomorphism_obstruction(self, other: "Graph") -> Optional[str]:
+        """Describe the first (cheapest) invariant that differs, or None if all agree."""
+        if self.order != other.order:
+            return "vertex counts differ"
+        if self.edge_count != other.edge_count:
+            return "edge counts differ"
+        if sorted(self.degrees) != sorted(other.degrees):
+            return "degree sequences differ"
+        if self.wl_multiset != other.wl_multiset:
+            return "color refinement classes differ"
+        if (
+            self._canonical_signature is not None
+            and other._canonical_signature is not None
+            and self._canonical_signature != other._canonical_signature
+        ):
+            return "canonical signatures differ"
+        return None
+
+    def find_isomorphism(
+        self,
+        other: "Graph",
+        only: Optional[Sequence[int]] = None,
+        *,
+        obstruction: Optional[str],
+    ) -> Optional[Tuple[int, ...]]:
+        """Return the first isomorphism (or `only`, if it is one), else None.
+
+        `obstruction` is `self.isomorphism_obstruction(other)`, which callers
+        compute once per pair and reuse across queries.
+        """
+        if obstruction is not None:
+            return None
+        if only is not None and len(only) != self.order:
+            return None
+        matches = self._match_vertices(other, exact=True, only=only, first=True)
+        return matches[0] if matches else None
+
+    def has_isomorphism(self, other: "Graph", *, obstruction: Optional[str]) -> bool:
+        """Whether an isomorphism exists; `obstruction` as for find_isomorphism()."""
+        if obstruction is not None:
+            return False
+        if self._canonical_signature is not None and other._canonical_signature is not None:
+            # isomorphism_obstruction() found the known signatures equal.
+            return True
+        return self.find_isomorphism(other, obstruction=None) is not None
+
+    def find_subgraph_embedding(self, other: "Graph") -> Optional[Tuple[int, ...]]:
+        """Return the first subgraph embedding into `other`, or None."""
+        if self.order > other.order or self.edge_count > other.edge_count:
+            return None
+        matches = self._match_vertices(other, exact=False, first=True)
+        return matches[0] if matches else None
+
 
 def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(
@@ -200,13 +475,42 @@ def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
         action="store_true",
         help="Print every check result instead of only failures.",
     )
-    return parser.parse_args(argv)
+    parser.add_argument(
+        "--cross-check",
+        action="store_true",
+        help=(
+            "Also recompute canonical signatures of graphs with at most "
+            f"{BRUTE_FORCE_MAX_ORDER} vertices by trying every vertex ordering, "
+            "and check that the canonical search agrees (slow)."
+        ),
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help=(
+            "Number of worker processes verifying pairs "
+            "(default: number of CPUs; 1 disables multiprocessing)."
+        ),
+    )
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        raise SystemExit("Number of jobs must be at least 1.")
+    return args
+
+
+_GRAPH_CACHE: dict = {}
 
 
 def load_graph(path: str) -> Graph:
-    if not os.path.exists(path):
-        raise FileNotFoundError(path)
-    return Graph.from_gxl(path)
+    """Parse a GXL file once, reusing the graph for every pair that references it."""
+    key = os.path.realpath(path)
+    graph = _GRAPH_CACHE.get(key)
+    if graph is None:
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        graph = _GRAPH_CACHE[key] = Graph.from_gxl(path)
+    return graph
 
 
 def map_metadata_permutation(
@@ -219,24 +523,25 @@ def map_metadata_permutation(
         raise ValueError(
             f"permutation length {len(meta_perm)} does not match pattern vertex count {pattern.order}"
         )
-    target_map = target.orig_to_index
-    mapped: List[int] = []
-    for value in meta_perm:
-        if value not in target_map:
-            raise ValueError(f"target original id {value} is not present in {target.path}")
-        mapped.append(target_map[value])
-    return tuple(mapped)
+    try:
+        return tuple(map(target.orig_to_index.__getitem__, meta_perm))
+    except KeyError as exc:
+        raise ValueError(
+            f"target original id {exc.args[0]} is not present in {target.path}"
+        ) from None
 
 
-def format_details(details: Optional[str]) -> str:
+def format_details(details: Details) -> str:
+    if callable(details):
+        details = details()
     return f" ({details})" if details else ""
 
 
-def add_check(checks: List[Check], subject: str, name: str, ok: bool, details: Optional[str] = None) -> None:
+def add_check(checks: List[Check], subject: str, name: str, ok: bool, details: Details = None) -> None:
     checks.append(Check(subject=subject, name=name, ok=ok, details=details))
 
 
-def verify_pair(pair: dict, base_dir: str) -> List[Check]:
+def verify_pair(pair: dict, base_dir: str, cross_check: bool = False) -> List[Check]:
     pair_id = pair.get("id", "<unknown>")
     checks: List[Check] = []
 
@@ -262,14 +567,14 @@ def verify_pair(pair: dict, base_dir: str) -> List[Check]:
             pair_id,
             "pattern_vertex_count",
             pattern_graph.order == expected,
-            f"expected {expected}, actual {pattern_graph.order}",
+            deferred("expected {}, actual {}", expected, pattern_graph.order),
         )
         add_check(
             checks,
             pair_id,
             "target_vertex_count",
             target_graph.order == expected,
-            f"expected {expected}, actual {target_graph.order}",
+            deferred("expected {}, actual {}", expected, target_graph.order),
         )
     else:
         if "pattern_vertex_count" in pair:
@@ -279,7 +584,7 @@ def verify_pair(pair: dict, base_dir: str) -> List[Check]:
                 pair_id,
                 "pattern_vertex_count",
                 pattern_graph.order == expected,
-                f"expected {expected}, actual {pattern_graph.order}",
+                deferred("expected {}, actual {}", expected, pattern_graph.order),
             )
         if "target_vertex_count" in pair:
             expected = pair["target_vertex_count"]
@@ -288,7 +593,7 @@ def verify_pair(pair: dict, base_dir: str) -> List[Check]:
                 pair_id,
                 "target_vertex_count",
                 target_graph.order == expected,
-                f"expected {expected}, actual {target_graph.order}",
+                deferred("expected {}, actual {}", expected, target_graph.order),
             )
 
     if "edge_count" in pair:
@@ -298,14 +603,14 @@ def verify_pair(pair: dict, base_dir: str) -> List[Check]:
             pair_id,
             "pattern_edge_count",
             pattern_graph.edge_count == expected,
-            f"expected {expected}, actual {pattern_graph.edge_count}",
+            deferred("expected {}, actual {}", expected, pattern_graph.edge_count),
         )
         add_check(
             checks,
             pair_id,
             "target_edge_count",
             target_graph.edge_count == expected,
-            f"expected {expected}, actual {target_graph.edge_count}",
+            deferred("expected {}, actual {}", expected, target_graph.edge_count),
         )
     else:
         if "pattern_edge_count" in pair:
@@ -315,7 +620,7 @@ def verify_pair(pair: dict, base_dir: str) -> List[Check]:
                 pair_id,
                 "pattern_edge_count",
                 pattern_graph.edge_count == expected,
-                f"expected {expected}, actual {pattern_graph.edge_count}",
+                deferred("expected {}, actual {}", expected, pattern_graph.edge_count),
             )
         if "target_edge_count" in pair:
             expected = pair["target_edge_count"]
@@ -324,60 +629,83 @@ def verify_pair(pair: dict, base_dir: str) -> List[Check]:
                 pair_id,
                 "target_edge_count",
                 target_graph.edge_count == expected,
-                f"expected {expected}, actual {target_graph.edge_count}",
+                deferred("expected {}, actual {}", expected, target_graph.edge_count),
             )
 
     if "canonical_signature" in pair:
         expected = pair["canonical_signature"]
-        actual_pattern = pattern_graph.canonical_signature()
-        actual_target = target_graph.canonical_signature()
+        packed = pack_signature(expected)
         add_check(
             checks,
             pair_id,
             "pattern_canonical_signature",
-            actual_pattern == expected,
-            f"expected {expected}, actual {actual_pattern}",
+            pattern_graph.packed_signature() == packed,
+            deferred_signatures(
+                "expected {}, actual {}", expected, pattern_graph.packed_signature()
+            ),
         )
         add_check(
             checks,
             pair_id,
             "target_canonical_signature",
-            actual_target == expected,
-            f"expected {expected}, actual {actual_target}",
+            target_graph.packed_signature() == packed,
+            deferred_signatures(
+                "expected {}, actual {}", expected, target_graph.packed_signature()
+            ),
         )
     else:
         if "pattern_canonical_signature" in pair:
             expected = pair["pattern_canonical_signature"]
-            actual = pattern_graph.canonical_signature()
             add_check(
                 checks,
                 pair_id,
                 "pattern_canonical_signature",
-                actual == expected,
-                f"expected {expected}, actual {actual}",
+                pattern_graph.packed_signature() == pack_signature(expected),
+                deferred_signatures(
+                    "expected {}, actual {}", expected, pattern_graph.packed_signature()
+                ),
             )
         if "target_canonical_signature" in pair:
             expected = pair["target_canonical_signature"]
-            actual = target_graph.canonical_signature()
             add_check(
                 checks,
                 pair_id,
                 "target_canonical_signature",
-                actual == expected,
-                f"expected {expected}, actual {actual}",
+                target_graph.packed_signature() == pack_signature(expected),
+                deferred_signatures(
+                    "expected {}, actual {}", expected, target_graph.packed_signature()
+                ),
+            )
+
+    if cross_check:
+        for role, graph in (("pattern", pattern_graph), ("target", target_graph)):
+            if graph.order > BRUTE_FORCE_MAX_ORDER:
+                continue
+            brute_force = graph.brute_force_signature()
+            add_check(
+                checks,
+                pair_id,
+                f"{role}_canonical_cross_check",
+                graph.packed_signature() == brute_force,
+                deferred_signatures(
+                    "search {}, brute force {}", graph.packed_signature(), brute_force
+                ),
             )
 
     pair_type = pair.get("type")
 
+    if pair_type in ("isomorphic", "non-isomorphic"):
+        # Deciding either declaration only needs to know whether one exists,
+        # and differing invariants usually settle that without any search.
+        obstruction = pattern_graph.isomorphism_obstruction(target_graph)
+        iso_exists = pattern_graph.has_isomorphism(target_graph, obstruction=obstruction)
+        if iso_exists:
+            iso_details = "isomorphism found"
+        else:
+            iso_details = obstruction or "no isomorphism exists"
+
     if pair_type == "isomorphic":
-        isomorphisms = pattern_graph.enumerate_isomorphisms(target_graph)
-        add_check(
-            checks,
-            pair_id,
-            "declared_isomorphic",
-            bool(isomorphisms),
-            f"found {len(isomorphisms)} isomorphism(s)",
-        )
+        add_check(checks, pair_id, "declared_isomorphic", iso_exists, iso_details)
         metadata_perms = pair.get("permutations")
         if metadata_perms is None and "permutation" in pair:
             metadata_perms = [pair["permutation"]]
@@ -395,8 +723,13 @@ def verify_pair(pair: dict, base_dir: str) -> List[Check]:
                     if not pattern_graph.check_mapping(target_graph, mapping):
                         valid = False
                 if valid:
-                    tupled = [tuple(m) for m in converted]
-                    subset_ok = all(t in isomorphisms for t in tupled)
+                    subset_ok = all(
+                        pattern_graph.find_isomorphism(
+                            target_graph, only=mapping, obstruction=obstruction
+                        )
+                        is not None
+                        for mapping in converted
+                    )
             except ValueError as exc:
                 valid = False
                 subset_ok = False
@@ -407,14 +740,14 @@ def verify_pair(pair: dict, base_dir: str) -> List[Check]:
                     pair_id,
                     "metadata_permutations_valid",
                     valid,
-                    f"permutations={metadata_perms}",
+                    deferred("permutations={}", metadata_perms),
                 )
                 add_check(
                     checks,
                     pair_id,
                     "metadata_permutations_subset",
                     subset_ok,
-                    f"permutations={metadata_perms}",
+                    deferred("permutations={}", metadata_perms),
                 )
         else:
             add_check(
@@ -426,23 +759,18 @@ def verify_pair(pair: dict, base_dir: str) -> List[Check]:
             )
 
     elif pair_type == "non-isomorphic":
-        isomorphisms = pattern_graph.enumerate_isomorphisms(target_graph)
-        add_check(
-            checks,
-            pair_id,
-            "declared_non_isomorphic",
-            len(isomorphisms) == 0,
-            f"found {len(isomorphisms)} isomorphism(s)",
-        )
+        add_check(checks, pair_id, "declared_non_isomorphic", not iso_exists, iso_details)
 
     elif pair_type == "subgraph_isomorphic":
-        embeddings = pattern_graph.enumerate_subgraph_embeddings(target_graph)
+        # Embeddings can be as many as target.order! / (target.order - pattern.order)!;
+        # the first one settles the declaration.
+        embedding_exists = pattern_graph.find_subgraph_embedding(target_graph) is not None
         add_check(
             checks,
             pair_id,
             "declared_subgraph_isomorphic",
-            bool(embeddings),
-            f"found {len(embeddings)} embedding(s)",
+            embedding_exists,
+            "embedding found" if embedding_exists else "no embedding exists",
         )
         metadata_perms = pair.get("permutations", [])
         if metadata_perms:
@@ -466,7 +794,7 @@ def verify_pair(pair: dict, base_dir: str) -> List[Check]:
                     pair_id,
                     "metadata_permutations_valid",
                     valid,
-                    f"permutations={metadata_perms}",
+                    deferred("permutations={}", metadata_perms),
                 )
         else:
             add_check(
@@ -478,13 +806,13 @@ def verify_pair(pair: dict, base_dir: str) -> List[Check]:
             )
 
     elif pair_type == "not_subgraph_isomorphic":
-        embeddings = pattern_graph.enumerate_subgraph_embeddings(target_graph)
+        embedding = pattern_graph.find_subgraph_embedding(target_graph)
         add_check(
             checks,
             pair_id,
             "declared_not_subgraph_isomorphic",
-            len(embeddings) == 0,
-            f"found {len(embeddings)} embedding(s)",
+            embedding is None,
+            "no embedding exists" if embedding is None else f"found embedding {list(embedding)}",
         )
     else:
         add_check(
@@ -522,7 +850,7 @@ def verify_parameters(metadata: dict, pairs: Sequence[dict]) -> List[Check]:
                 subject,
                 key,
                 expected == actual,
-                f"expected {expected}, actual {actual}",
+                deferred("expected {}, actual {}", expected, actual),
             )
 
     return checks
@@ -556,8 +884,18 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
     pairs = metadata.get("pairs", [])
 
     all_checks: List[Check] = []
-    for pair in pairs:
-        all_checks.extend(verify_pair(pair, base_dir))
+    check_pair = functools.partial(
+        verify_pair, base_dir=base_dir, cross_check=args.cross_check
+    )
+    if args.jobs > 1 and len(pairs) > 1:
+        # Pairs are independent; map() keeps the results in metadata order.
+        chunksize = max(1, len(pairs) // (4 * args.jobs))
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            for checks in executor.map(check_pair, pairs, chunksize=chunksize):
+                all_checks.extend(checks)
+    else:
+        for pair in pairs:
+            all_checks.extend(check_pair(pair))
     all_checks.extend(verify_parameters(metadata, pairs))
 
     success = print_results(all_checks, verbose=args.verbose)